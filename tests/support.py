@@ -0,0 +1,37 @@
+import threading
+
+import utang_tracker as ut
+
+
+class FakeRoot:
+    """Stands in for the Tk root: the storage code only schedules the due date timer on it"""
+
+    def after(self, ms, callback):
+        return None
+
+    def after_cancel(self, job):
+        pass
+
+
+def make_app(backend):
+    """A tracker with its storage set up in the current directory and no window"""
+    app = ut.ModernUtangTracker.__new__(ut.ModernUtangTracker)
+    app.storage_backend = backend
+    app.settings = {"storage_backend": backend}
+    app.db = None
+    app.storage_lock = threading.RLock()
+    app.ledger_lock = threading.RLock()
+    app.compaction_lock = threading.Lock()
+    app.compaction_thread = None
+    app.change_log_cache = {}
+    app.partition_rewrites = 0
+    app.ledger = None
+    app.due_date_ledger = None
+    app.due_date_job = None
+    app.root = FakeRoot()
+    app.pending_changes = []
+    app.current_view = "login"
+    app.dashboard_frame = None
+    app.current_user = "alice"
+    app.init_csv_files()
+    return app
@@ -0,0 +1,92 @@
+import os
+import random
+import shutil
+import tempfile
+import unittest
+
+import utang_tracker as ut
+from tests.support import make_app
+from tests.test_rollups import make_debt, make_payments
+
+
+class ChangeLogTests(unittest.TestCase):
+    def setUp(self):
+        ut.import_numpy()
+        self.directory = tempfile.mkdtemp()
+        self.previous_directory = os.getcwd()
+        os.chdir(self.directory)
+        self.app = make_app("csv")
+        self.rng = random.Random(4)
+        for index in range(30):
+            self.app.add_debt(make_debt(index, self.rng))
+        self.debt_ids = [f"alice_debt_{index}" for index in range(30)]
+        self.app.add_payments(make_payments(self.debt_ids, 100, self.rng))
+        # Edits and deletes go to the change log rather than the CSV files
+        for debt in self.app.get_user_debts()[:10]:
+            self.app.update_debt(debt["debt_id"], {**{field: debt[field] for field in ut.DEBT_FIELDS},
+                                                   "amount": str(float(debt["amount"]) + 1), "notes": "edited"})
+        self.app.delete_debts(self.debt_ids[10:15])
+        self.partition = self.app.get_partition_dir()
+        self.log_path = os.path.join(self.partition, ut.CHANGE_LOG_FILE)
+
+    def tearDown(self):
+        os.chdir(self.previous_directory)
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def snapshot(self):
+        self.app.ledger = None
+        ledger = self.app.get_ledger()
+        return self.app.get_user_debts(), self.app.get_user_payment_rows(), ledger.get_summary()
+
+    def during_merge(self, action):
+        """Run action once compaction has measured the files but before it replaces them"""
+        read_merged_rows = self.app.read_merged_rows
+
+        def read_then_act(*args, **kwargs):
+            rows = read_merged_rows(*args, **kwargs)
+            if not hasattr(self, "acted"):
+                self.acted = True
+                action()
+            return rows
+
+        self.app.read_merged_rows = read_then_act
+
+    def test_compaction_keeps_rows(self):
+        self.assertTrue(os.path.exists(self.log_path))
+        before = self.snapshot()
+        self.app.compact_change_log(self.partition)
+        self.assertFalse(os.path.exists(self.log_path))
+        self.assertEqual(self.snapshot(), before)
+
+    def test_changes_made_during_compaction_are_kept(self):
+        debt = self.app.get_user_debts()[0]
+        edited = {**{field: debt[field] for field in ut.DEBT_FIELDS}, "notes": "edited again"}
+
+        def write():
+            self.app.update_debt(debt["debt_id"], edited)
+            self.app.add_payments([[debt["debt_id"], 5.0, "2024-05-05"]])
+
+        self.during_merge(write)
+        self.app.compact_change_log(self.partition)
+        del self.app.read_merged_rows
+        self.assertTrue(os.path.exists(self.log_path))
+        after = self.snapshot()
+        self.assertEqual(after[0][0]["notes"], "edited again")
+        self.assertEqual(after[1][-1]["payment_date"], "2024-05-05")
+
+        # Folding the carried-over entries as well changes nothing
+        self.app.compact_change_log(self.partition)
+        self.assertFalse(os.path.exists(self.log_path))
+        self.assertEqual(self.snapshot(), after)
+
+    def test_clear_during_compaction_is_not_undone(self):
+        self.during_merge(self.app.clear_user_data)
+        self.app.compact_change_log(self.partition)
+        del self.app.read_merged_rows
+        self.assertEqual(self.app.get_user_debts(), [])
+        self.assertEqual(self.app.get_user_payment_rows(), [])
+        self.assertEqual([name for name in os.listdir(self.partition) if name.endswith(".tmp")], [])
+
+
+if __name__ == "__main__":
+    unittest.main()
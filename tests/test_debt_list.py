@@ -0,0 +1,123 @@
+import os
+import random
+import shutil
+import tempfile
+import unittest
+from datetime import date
+
+import utang_tracker as ut
+from tests.support import make_app
+from tests.test_rollups import make_debt, make_payments
+
+
+def filter_person(app, person_data, search_name, relationship_filter, status_filter, min_amount, max_amount):
+    """The per-person check the debt list ran on every card before filters were compiled"""
+    if search_name and search_name not in person_data["full_name"].lower():
+        return False
+    if relationship_filter != "All" and person_data["relationship"] != relationship_filter:
+        return False
+    if person_data["remaining"] < min_amount or person_data["remaining"] > max_amount:
+        return False
+    if status_filter != "All":
+        return any(app.get_debt_status(debt) == status_filter for debt in person_data["debt_history"])
+    return True
+
+
+class DebtListTests(unittest.TestCase):
+    def setUp(self):
+        ut.import_numpy()
+        self.directory = tempfile.mkdtemp()
+        self.previous_directory = os.getcwd()
+        os.chdir(self.directory)
+        self.app = make_app("csv")
+        self.rng = random.Random(14)
+        for index in range(60):
+            self.app.add_debt(make_debt(index, self.rng))
+        self.debt_ids = [f"alice_debt_{index}" for index in range(60)]
+        self.app.add_payments(make_payments(self.debt_ids, 200, self.rng))
+        self.ledger = self.app.get_ledger()
+
+    def tearDown(self):
+        os.chdir(self.previous_directory)
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def get_rows(self, debt_filter, shown_people=None):
+        return self.app.create_debt_cards(self.app.get_consolidation(), debt_filter, shown_people)
+
+    def assertRefreshMatches(self, debt_filter, write):
+        """Rebuilding only the people a write touched gives the rows a full rebuild gives"""
+        before = self.get_rows(debt_filter)
+        changed_people = write()
+        self.assertIs(self.app.ledger, self.ledger)
+        shown_people = {self.app.get_person_key(row[1]): row[1] for row in before if row[0] == "card"}
+        for key in changed_people:
+            shown_people.pop(key, None)
+        self.assertEqual(self.get_rows(debt_filter, shown_people), self.get_rows(debt_filter))
+
+    def test_compiled_filter_matches_per_person_check(self):
+        today = date.today().toordinal()
+        for index in range(60, 90):
+            debt = make_debt(index, self.rng)
+            debt["due_date"] = date.fromordinal(today + self.rng.randrange(-200, 200)).isoformat()
+            if index % 5 == 0:
+                debt["interest_rate"] = "0"
+            self.app.add_debt(debt)
+            if index % 5 == 0:
+                # Settled exactly, so some people have a "Paid" debt
+                self.app.add_payments([[debt["debt_id"], float(debt["amount"]), debt["date_added"]]])
+        consolidation = self.app.get_consolidation()
+        people = [consolidation.get_person(group) for group in range(len(consolidation))]
+        searches = ["", "person", "person 3", "son 1", "nobody"]
+        amounts = [(float("-inf"), float("inf")), (0.0, float("inf")), (float("-inf"), 1000.0), (500.0, 3000.0),
+                   (-50.0, 0.0)]
+        # Bounds landing exactly on a person's balance
+        amounts += [(person["remaining"], person["remaining"]) for person in people[:2]]
+        for search_name in searches:
+            for relationship_filter in ["All"] + ut.RELATIONSHIPS:
+                for status_filter in ["All"] + ut.DEBT_STATUSES:
+                    for min_amount, max_amount in amounts:
+                        criteria = (search_name, relationship_filter, status_filter, min_amount, max_amount)
+                        with self.subTest(criteria=criteria):
+                            groups = self.app.compile_debt_filter(*criteria)(consolidation)
+                            expected = [group for group, person in enumerate(people)
+                                        if filter_person(self.app, person, *criteria)]
+                            self.assertEqual(groups.tolist(), expected)
+
+    def test_incremental_refresh(self):
+        filters = [
+            self.app.compile_debt_filter("", "All", "All", float("-inf"), float("inf")),
+            self.app.compile_debt_filter("person", "Who I owe", "All", 100.0, float("inf")),
+            self.app.compile_debt_filter("", "All", "Paid", float("-inf"), float("inf")),
+        ]
+        for debt_filter in filters:
+            with self.subTest("payment"):
+                debt_id = self.rng.choice(self.debt_ids)
+                self.assertRefreshMatches(debt_filter, lambda: (
+                    self.app.add_payments([[debt_id, 50.0, "2024-01-01"]]) or self.ledger.get_people([debt_id])))
+            with self.subTest("new person"):
+                debt = make_debt(len(self.debt_ids), self.rng)
+                debt["full_name"] = f"Newcomer {len(self.debt_ids)}"
+                self.debt_ids.append(debt["debt_id"])
+                self.assertRefreshMatches(debt_filter, lambda: (
+                    self.app.add_debt(debt) or self.ledger.get_people([debt["debt_id"]])))
+            with self.subTest("edit"):
+                debt = self.app.get_user_debts()[self.rng.randrange(10)]
+                edited = {**{field: debt[field] for field in ut.DEBT_FIELDS}, "amount": "12"}
+
+                def edit():
+                    people = self.ledger.get_people([debt["debt_id"]])
+                    self.app.update_debt(debt["debt_id"], edited)
+                    return people
+                self.assertRefreshMatches(debt_filter, edit)
+            with self.subTest("delete"):
+                deleted = self.debt_ids.pop(self.rng.randrange(len(self.debt_ids)))
+
+                def delete():
+                    people = self.ledger.get_people([deleted])
+                    self.app.delete_debts([deleted])
+                    return people
+                self.assertRefreshMatches(debt_filter, delete)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,304 @@
+import random
+import unittest
+from datetime import date
+
+import utang_tracker as ut
+
+FIRST_DAY = date(2022, 1, 1).toordinal()
+
+
+def make_debts(count, rng, duplicates=0):
+    debts = [dict(zip(ut.DEBT_FIELDS, [
+        "alice", f"Person {index % 9}", str(rng.randrange(50, 5000)), rng.choice(ut.RELATIONSHIPS),
+        str(rng.choice([0, 5, 12])), date.fromordinal(FIRST_DAY + rng.randrange(3 * 365)).isoformat(),
+        "N/A", "", "active", f"alice_debt_{index}",
+    ])) for index in range(count)]
+    # Rows repeating an earlier debt_id, as old files may hold
+    for index in range(duplicates):
+        debts.append(dict(debts[rng.randrange(count)], full_name=f"Copy {index}"))
+    return debts
+
+
+def make_payments(debts, count, rng, in_date_order=False):
+    # Random dates, so unless sorted a debt's payments are out of date order in the file
+    payments = [{"debt_id": rng.choice(debts)["debt_id"], "payment_amount": str(rng.randrange(1, 50000) / 100),
+                 "payment_date": date.fromordinal(FIRST_DAY + rng.randrange(3 * 365)).isoformat()}
+                for _ in range(count)]
+    if in_date_order:
+        payments.sort(key=lambda payment: payment["payment_date"])
+    return payments
+
+
+def random_range(rng):
+    start = FIRST_DAY - 30 + rng.randrange(3 * 365 + 60) if rng.random() < 0.8 else None
+    end = FIRST_DAY - 30 + rng.randrange(3 * 365 + 60) if rng.random() < 0.8 else None
+    if start is not None and end is not None and start > end:
+        start, end = end, start
+    return start, end
+
+
+def consolidate_by_scan(debts, payments, start=None, end=None):
+    """Consolidation the way the per-debt loop before the ledger built it, one pass over the payments per debt"""
+    today = date.today().toordinal()
+    consolidated = {relationship: {} for relationship in ut.RELATIONSHIPS}
+    for debt in debts:
+        added = date.fromisoformat(debt["date_added"]).toordinal()
+        if (start is not None and added < start) or (end is not None and added > end):
+            continue
+        people = consolidated[debt["relationship"]]
+        person = people.setdefault(debt["full_name"], {
+            "full_name": debt["full_name"], "relationship": debt["relationship"], "debt_history": [],
+            "total_amount": 0, "total_paid": 0, "total_owed": 0, "remaining": 0, "latest_due_date": debt["due_date"],
+        })
+        paid = 0
+        for payment in payments:
+            paid_on = date.fromisoformat(payment["payment_date"]).toordinal()
+            if payment["debt_id"] == debt["debt_id"] and (start is None or paid_on >= start) and (end is None or paid_on <= end):
+                paid += float(payment["payment_amount"])
+        owed = float(debt["amount"]) * (1 + float(debt["interest_rate"]) / 100)
+        if owed - paid == 0:
+            status = "Paid"
+        elif debt["due_date"] != "N/A" and date.fromisoformat(debt["due_date"]).toordinal() <= today:
+            status = "Overdue"
+        else:
+            status = "Pending"
+        person["debt_history"].append({
+            "debt_id": debt["debt_id"], "amount": float(debt["amount"]), "interest_rate": float(debt["interest_rate"]),
+            "date_added": debt["date_added"], "due_date": debt["due_date"], "notes": debt["notes"],
+            "payments": paid, "owed": owed, "remaining": owed - paid, "status": status,
+        })
+        person["total_amount"] += float(debt["amount"])
+        person["total_paid"] += paid
+        person["total_owed"] += owed
+        person["remaining"] += owed - paid
+        if debt["due_date"] != "N/A" and (person["latest_due_date"] == "N/A" or debt["due_date"] > person["latest_due_date"]):
+            person["latest_due_date"] = debt["due_date"]
+    return {relationship: list(people.values()) for relationship, people in consolidated.items()}
+
+
+class ConsolidationTests(unittest.TestCase):
+    def setUp(self):
+        ut.import_numpy()
+        self.rng = random.Random(7)
+
+    def assertSameConsolidation(self, consolidated, expected, exact):
+        """Same people in the same order with the same debts; figures match exactly when exact is set"""
+        self.assertEqual(list(consolidated), list(expected))
+        for relationship, people in expected.items():
+            self.assertEqual([person["full_name"] for person in consolidated[relationship]],
+                             [person["full_name"] for person in people])
+            for person, expected_person in zip(consolidated[relationship], people):
+                if exact:
+                    self.assertEqual(person, expected_person)
+                    continue
+                self.assertEqual(len(person["debt_history"]), len(expected_person["debt_history"]))
+                for field, value in expected_person.items():
+                    if isinstance(value, float):
+                        self.assertAlmostEqual(person[field], value, places=6)
+                    elif field != "debt_history":
+                        self.assertEqual(person[field], value)
+                for debt, expected_debt in zip(person["debt_history"], expected_person["debt_history"]):
+                    for field, value in expected_debt.items():
+                        if isinstance(value, float):
+                            self.assertAlmostEqual(debt[field], value, places=6)
+                        else:
+                            self.assertEqual(debt[field], value)
+
+    def test_matches_per_debt_loop(self):
+        debts = make_debts(150, self.rng, duplicates=10)
+        for debt in debts:
+            if self.rng.random() < 0.6:
+                debt["due_date"] = date.fromordinal(date.today().toordinal() + self.rng.randrange(-400, 400)).isoformat()
+        payments = make_payments(debts, 1200, self.rng)
+        # Paid off exactly, so the status comes out "Paid"
+        for index in range(5):
+            debts.append(dict(debts[index], debt_id=f"alice_settled_{index}", interest_rate="0"))
+            payments.append({"debt_id": debts[-1]["debt_id"], "payment_amount": debts[-1]["amount"],
+                             "payment_date": debts[-1]["date_added"]})
+        ledger = ut.DebtLedger("alice", debts, payments)
+        self.assertSameConsolidation(ledger.consolidate().to_dict(), consolidate_by_scan(debts, payments), exact=True)
+        for _ in range(20):
+            start, end = random_range(self.rng)
+            with self.subTest(start=start, end=end):
+                self.assertSameConsolidation(ledger.consolidate(start, end).to_dict(),
+                                             consolidate_by_scan(debts, payments, start, end), exact=False)
+
+
+class NameSearchTests(unittest.TestCase):
+    # Mixed case, accents and a codepoint beyond the BMP, so lowering and the trigram keys both get exercised
+    LETTERS = "aAbBeEnNñÑéÉoO😀 -'"
+
+    def setUp(self):
+        ut.import_numpy()
+        self.rng = random.Random(11)
+
+    def make_name(self):
+        return "".join(self.rng.choice(self.LETTERS) for _ in range(self.rng.randrange(1, 12)))
+
+    def assertMatchesSubstringSearch(self, ledger, query):
+        """The codes a plain substring scan over every name finds, as the filter before the index did"""
+        expected = [code for code, name in enumerate(ledger.names) if query.lower() in name.lower()]
+        with self.subTest(query=query):
+            self.assertEqual(ledger.search_names(query).tolist(), expected)
+
+    def test_matches_substring_search(self):
+        debts = make_debts(300, self.rng)
+        for debt in debts:
+            debt["full_name"] = self.make_name()
+        ledger = ut.DebtLedger("alice", debts, [])
+        for _ in range(40):
+            # Typed a letter at a time and erased again, as live search sees it, then an unrelated query
+            name = self.rng.choice(ledger.names)
+            start = self.rng.randrange(len(name))
+            typed = name[start:start + self.rng.randrange(1, 8)]
+            for length in list(range(1, len(typed) + 1)) + list(range(len(typed) - 1, 0, -1)):
+                self.assertMatchesSubstringSearch(ledger, typed[:length])
+            self.assertMatchesSubstringSearch(ledger, self.make_name())
+            self.assertMatchesSubstringSearch(ledger, "")
+            if self.rng.random() < 0.3:
+                ledger.add_debt(dict(debts[0], full_name=self.make_name(), debt_id=f"alice_new_{len(ledger)}"))
+
+
+class DateRangeTests(unittest.TestCase):
+    def setUp(self):
+        ut.import_numpy()
+        self.rng = random.Random(25)
+
+    def assertMatchesLinearScan(self, ledger, ranges=40):
+        """get_debts_in_range gives the rows a scan over every date_added keeps, in row order"""
+        np = ut.np
+        dates = ledger.date_added.tolist()
+        # Bounds falling on debt dates as well as between them, plus an empty (reversed) range
+        bounds = [random_range(self.rng) for _ in range(ranges)]
+        bounds += [(self.rng.choice(dates), self.rng.choice(dates)) for _ in range(ranges)]
+        bounds += [(dates[0], dates[0]), (dates[0] + 1, dates[0] - 1)]
+        for start, end in bounds:
+            with self.subTest(start=start, end=end):
+                mask = np.ones(len(ledger), dtype=bool)
+                if start is not None:
+                    mask &= ledger.date_added >= start
+                if end is not None:
+                    mask &= ledger.date_added <= end
+                self.assertEqual(ledger.get_debts_in_range(start, end).tolist(), np.flatnonzero(mask).tolist())
+
+    def test_matches_linear_scan(self):
+        debts = make_debts(400, self.rng, duplicates=20)
+        # Many debts on one day, so equal dates have to come back in row order
+        for debt in debts[::7]:
+            debt["date_added"] = "2023-05-05"
+        ledger = ut.DebtLedger("alice", debts, [])
+        self.assertMatchesLinearScan(ledger)
+
+        # The index is kept in place for added debts and rebuilt after edits and deletes
+        for index in range(30):
+            ledger.add_debt(dict(self.rng.choice(debts), debt_id=f"alice_new_{index}"))
+        self.assertMatchesLinearScan(ledger)
+        for debt in self.rng.sample(debts, 20):
+            ledger.update_debt(debt["debt_id"], dict(debt, date_added="2022-02-02"))
+        self.assertMatchesLinearScan(ledger)
+        ledger.remove_debts([debt["debt_id"] for debt in self.rng.sample(debts, 50)])
+        self.assertMatchesLinearScan(ledger)
+
+
+class PaidPerDebtTests(unittest.TestCase):
+    def setUp(self):
+        ut.import_numpy()
+        self.rng = random.Random(24)
+
+    def scan_paid(self, ledger, rows, start, end):
+        """Paid per debt the simple way: bincount the payments the range mask keeps"""
+        np = ut.np
+        mask = ledger.get_payment_mask(start, end)
+        paid = np.bincount(ledger.payment_debts[mask], weights=ledger.payment_amounts[mask], minlength=len(ledger))
+        # Repeated debt_ids share the payments of their first row
+        owners = [ledger.debt_index[ledger.debt_ids[row]] for row in rows.tolist()]
+        return paid[owners]
+
+    def assertMatchesScan(self, ledger, ranges=50, in_date_order=False):
+        """Ranges covering all of a debt's payments match the scan exactly, and so do ranges starting at or
+        before its first payment when the file holds its payments in date order (both add them up in the
+        same order then); only ranges starting partway through its payments may differ by rounding"""
+        np = ut.np
+        owners = np.array([ledger.debt_index[debt_id] for debt_id in ledger.debt_ids], dtype=np.int64)
+        first_dates = np.full(len(ledger), np.iinfo(np.int32).max)
+        last_dates = np.full(len(ledger), np.iinfo(np.int32).min)
+        np.minimum.at(first_dates, ledger.payment_debts, ledger.payment_dates)
+        np.maximum.at(last_dates, ledger.payment_debts, ledger.payment_dates)
+        for _ in range(ranges):
+            start, end = random_range(self.rng)
+            for rows in (ledger.get_debts_in_range(start, end), np.arange(len(ledger)),
+                         np.sort(self.rng.sample(range(len(ledger)), len(ledger) // 3))):
+                rows = np.asarray(rows, dtype=np.int64)
+                with self.subTest(start=start, end=end, rows=len(rows)):
+                    paid = ledger.get_paid_per_debt(rows, start, end)
+                    expected = self.scan_paid(ledger, rows, start, end)
+                    from_first = np.full(len(rows), start is None) | (first_dates[owners[rows]] >= (start or 0))
+                    to_last = np.full(len(rows), end is None) | (last_dates[owners[rows]] <= (end or 0))
+                    exact = from_first if in_date_order else from_first & to_last
+                    self.assertEqual(paid[exact].tolist(), expected[exact].tolist())
+                    np.testing.assert_allclose(paid[~exact], expected[~exact], rtol=1e-9, atol=1e-6)
+
+    def test_random_ranges(self):
+        debts = make_debts(200, self.rng)
+        self.assertMatchesScan(ut.DebtLedger("alice", debts, make_payments(debts, 3000, self.rng)))
+
+    def test_random_ranges_in_date_order(self):
+        debts = make_debts(200, self.rng)
+        payments = make_payments(debts, 3000, self.rng, in_date_order=True)
+        self.assertMatchesScan(ut.DebtLedger("alice", debts, payments), in_date_order=True)
+
+    def test_debt_with_many_payments(self):
+        # More payments than PAYMENT_RUN_STEPS, so its running total comes from its own cumsum
+        debts = make_debts(20, self.rng)
+        payments = make_payments(debts, 200, self.rng) + make_payments(debts[:1], 3 * ut.PAYMENT_RUN_STEPS, self.rng)
+        payments.sort(key=lambda payment: payment["payment_date"])
+        self.assertMatchesScan(ut.DebtLedger("alice", debts, payments), in_date_order=True)
+
+    def test_settled_debts_with_payments_outside_range(self):
+        debts, payments = [], []
+        for index in range(2000):
+            amount = 250.5 + index % 37
+            debt_id = f"alice_debt_{index}"
+            debts.append(dict(zip(ut.DEBT_FIELDS, [
+                "alice", f"Person {index % 50}", str(amount), ut.RELATIONSHIPS[index % 2], "10", "2023-01-15",
+                "2023-02-15", "", "active", debt_id,
+            ])))
+            # Paid off within the range, then paid again after it ends
+            payments.append({"debt_id": debt_id, "payment_amount": str(amount * 1.1), "payment_date": "2023-02-01"})
+            payments.append({"debt_id": debt_id, "payment_amount": "10", "payment_date": "2023-06-01"})
+        ledger = ut.DebtLedger("alice", debts, payments)
+        ledger.rollups = ut.MonthlyRollups.from_ledger(ledger)
+        # A partial month (the per-debt path) and whole months (the rollup path)
+        for start, end in ((date(2023, 1, 1), date(2023, 4, 1)), (date(2023, 1, 1), date(2023, 4, 30))):
+            start, end = start.toordinal(), end.toordinal()
+            with self.subTest(start=start, end=end):
+                self.assertEqual(ledger.get_summary(start, end)["active_debts"], 0)
+                consolidation = ledger.consolidate(start, end)
+                self.assertEqual(consolidation.debt_remaining.tolist(), [0.0] * len(ledger))
+                statuses = {debt["status"] for people in consolidation.to_dict().values()
+                            for person in people for debt in person["debt_history"]}
+                self.assertEqual(statuses, {"Paid"})
+
+    def test_payments_added_in_place(self):
+        debts = make_debts(80, self.rng)
+        ledger = ut.DebtLedger("alice", debts, make_payments(debts, 800, self.rng))
+        ledger.get_paid_per_debt(ut.np.arange(len(ledger)))
+        ledger.add_payments([[payment["debt_id"], payment["payment_amount"], payment["payment_date"]]
+                             for payment in make_payments(debts, 200, self.rng)])
+        self.assertMatchesScan(ledger)
+
+    def test_empty_ledger(self):
+        np = ut.np
+        ledger = ut.DebtLedger("alice", [], [])
+        for start, end in ((None, None), (FIRST_DAY, FIRST_DAY + 30)):
+            self.assertEqual(ledger.get_paid_per_debt(np.arange(0), start, end).tolist(), [])
+
+    def test_debts_without_payments(self):
+        debts = make_debts(30, self.rng)
+        ledger = ut.DebtLedger("alice", debts, [])
+        self.assertEqual(ledger.get_paid_per_debt(ut.np.arange(len(ledger))).tolist(), [0.0] * 30)
+        self.assertMatchesScan(ledger, ranges=10)
+
+
+if __name__ == "__main__":
+    unittest.main()
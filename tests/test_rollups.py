@@ -0,0 +1,211 @@
+import os
+import random
+import shutil
+import tempfile
+import unittest
+from datetime import date
+
+import utang_tracker as ut
+from tests.support import make_app
+
+
+def make_debt(index, rng):
+    added = date(2022, 1, 1).toordinal() + rng.randrange(3 * 365)
+    return dict(zip(ut.DEBT_FIELDS, [
+        "alice", f"Person {index % 7}", str(rng.randrange(50, 5000)), rng.choice(ut.RELATIONSHIPS),
+        str(rng.choice([0, 0, 5, 12])), date.fromordinal(added).isoformat(), "N/A", "", "active",
+        f"alice_debt_{index}",
+    ]))
+
+
+def make_payments(debt_ids, count, rng):
+    return [[rng.choice(debt_ids), float(rng.randrange(1, 500)),
+             date.fromordinal(date(2022, 1, 1).toordinal() + rng.randrange(3 * 365)).isoformat()]
+            for _ in range(count)]
+
+
+def month_start(year, month):
+    return date(year, month, 1).toordinal()
+
+
+def month_end(year, month):
+    return date(year + month // 12, month % 12 + 1, 1).toordinal() - 1
+
+
+# Whole-month ranges, so get_summary and get_monthly_payments take the rollup path
+WHOLE_MONTH_RANGES = [
+    (None, None),
+    (month_start(2022, 6), month_end(2023, 2)),
+    (month_start(2023, 1), None),
+    (None, month_end(2022, 12)),
+    (month_start(2024, 3), month_end(2024, 3)),
+    (date.min.toordinal(), date.max.toordinal()),
+]
+
+
+class RollupTests:
+    """Shared by the CSV and SQLite test cases below"""
+    backend = None
+
+    def setUp(self):
+        ut.import_numpy()
+        self.directory = tempfile.mkdtemp()
+        self.previous_directory = os.getcwd()
+        os.chdir(self.directory)
+        self.app = make_app(self.backend)
+        self.rng = random.Random(23)
+        for index in range(40):
+            self.app.add_debt(make_debt(index, self.rng))
+        self.debt_ids = [f"alice_debt_{index}" for index in range(40)]
+        self.app.add_payments(make_payments(self.debt_ids, 150, self.rng))
+
+    def tearDown(self):
+        if self.app.db is not None:
+            self.app.db.close()
+        os.chdir(self.previous_directory)
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def assertSameTotals(self, ledger):
+        """The rollup path gives what a full scan of the ledger gives"""
+        rollups = ledger.rollups
+        self.assertIsNotNone(rollups)
+        for start, end in WHOLE_MONTH_RANGES:
+            with self.subTest(start=start, end=end):
+                with_rollups = ledger.get_summary(start, end), ledger.get_monthly_payments(start, end)
+                ledger.rollups = None
+                try:
+                    scanned = ledger.get_summary(start, end), ledger.get_monthly_payments(start, end)
+                finally:
+                    ledger.rollups = rollups
+                self.assertEqual(with_rollups[0]["active_debts"], scanned[0]["active_debts"])
+                for relationship in ut.RELATIONSHIPS:
+                    for total, value in scanned[0][relationship].items():
+                        self.assertAlmostEqual(with_rollups[0][relationship][total], value, places=6)
+                self.assertEqual(with_rollups[1][0], scanned[1][0])
+                for total, value in zip(with_rollups[1][1], scanned[1][1]):
+                    self.assertAlmostEqual(total, value, places=6)
+
+    def assertSameCells(self, rollups, expected):
+        self.assertEqual(rollups.cells.keys(), expected.cells.keys())
+        for key, cell in expected.cells.items():
+            for value, expected_value in zip(rollups.cells[key], cell):
+                self.assertAlmostEqual(value, expected_value, places=6)
+
+    def test_loaded_rollups_match_scan(self):
+        self.assertSameTotals(self.app.get_ledger())
+
+    def test_summary_from_consolidation(self):
+        ledger = self.app.get_ledger()
+        partial_range = (month_start(2022, 6) + 3, month_end(2023, 2) - 3)
+        for start, end in WHOLE_MONTH_RANGES + [partial_range]:
+            with self.subTest(start=start, end=end):
+                ledger.consolidations.clear()
+                computed = ledger.get_summary(start, end)
+                reused = ledger.get_summary(start, end, ledger.consolidate(start, end))
+                self.assertEqual(reused["active_debts"], computed["active_debts"])
+                for relationship in ut.RELATIONSHIPS:
+                    for total, value in computed[relationship].items():
+                        self.assertAlmostEqual(reused[relationship][total], value, places=6)
+
+    def test_writes_keep_rollups_in_step(self):
+        ledger = self.app.get_ledger()
+        self.app.add_debt(make_debt(40, self.rng))
+        self.app.add_payments(make_payments(self.debt_ids + ["alice_debt_40"], 30, self.rng))
+
+        debt = self.app.get_user_debts()[3]
+        debt = {field: debt[field] for field in ut.DEBT_FIELDS}
+        debt.update(amount="777", interest_rate="3", date_added="2021-05-05",
+                    relationship=ut.RELATIONSHIPS[1 - ut.RELATIONSHIPS.index(debt["relationship"])])
+        self.app.update_debt(debt["debt_id"], debt)
+        self.assertIs(self.app.ledger, ledger)
+        self.assertSameTotals(ledger)
+        self.assertSameCells(ledger.rollups, ut.MonthlyRollups.from_ledger(ledger))
+
+        self.app.delete_debts(self.debt_ids[:5])
+        ledger = self.app.get_ledger()
+        self.assertTrue(ledger.rollups.matches(ledger))
+        self.assertSameTotals(ledger)
+
+    def test_stored_rollups_round_trip(self):
+        ledger = self.app.get_ledger()
+        self.app.add_payments(make_payments(self.debt_ids, 10, self.rng))
+        self.assertSameCells(self.app.read_rollups(), ledger.rollups)
+
+        self.app.ledger = None
+        reloaded = self.app.get_ledger()
+        self.assertSameCells(reloaded.rollups, ledger.rollups)
+        self.assertSameTotals(reloaded)
+
+    def test_write_without_ledger_drops_stored_rollups(self):
+        self.app.get_ledger()
+        self.app.ledger = None
+        self.app.add_payments(make_payments(self.debt_ids, 5, self.rng))
+        self.assertIsNone(self.app.read_rollups())
+        self.assertSameTotals(self.app.get_ledger())
+
+
+class CsvRollupTests(RollupTests, unittest.TestCase):
+    backend = "csv"
+
+    def test_stale_fingerprint_rebuilds(self):
+        ledger = self.app.get_ledger()
+        # A payment that reached the CSV file without its rollup write, as after a crash between the two
+        with open(self.app.get_table_path("payments"), "a", newline="") as file:
+            file.write(f"{self.debt_ids[0]},25.0,2023-03-03\n")
+        self.assertIsNone(self.app.read_rollups())
+
+        self.app.ledger = None
+        reloaded = self.app.get_ledger()
+        self.assertEqual(len(reloaded.payment_debts), len(ledger.payment_debts) + 1)
+        self.assertSameTotals(reloaded)
+        self.assertIsNotNone(self.app.read_rollups())
+
+    def test_compaction_keeps_stored_rollups(self):
+        self.app.get_ledger()
+        debt = self.app.get_user_debts()[0]
+        self.app.update_debt(debt["debt_id"], {**{field: debt[field] for field in ut.DEBT_FIELDS}, "amount": "999"})
+        self.app.delete_debts(self.debt_ids[5:8])
+        ledger = self.app.get_ledger()
+        stored = self.app.read_rollups()
+        self.assertIsNotNone(stored)
+
+        # As on exit: the change log is folded into the CSV files, which changes their sizes
+        self.app.compact_change_log(self.app.get_partition_dir())
+        self.assertFalse(os.path.exists(os.path.join(self.app.get_partition_dir(), ut.CHANGE_LOG_FILE)))
+        self.assertSameCells(self.app.read_rollups(), stored)
+        self.app.ledger = None
+        self.assertSameCells(self.app.get_ledger().rollups, ledger.rollups)
+
+
+class SqliteRollupTests(RollupTests, unittest.TestCase):
+    backend = "sqlite"
+
+    def test_failed_rollup_write_rolls_back_data(self):
+        self.app.get_ledger()
+        count = self.app.db.execute("SELECT COUNT(*) FROM payments").fetchone()[0]
+
+        def fail(*args, **kwargs):
+            raise OSError("disk full")
+
+        self.app.write_rollups = fail
+        with self.assertRaises(OSError):
+            self.app.add_payments(make_payments(self.debt_ids, 3, self.rng))
+        self.assertEqual(self.app.db.execute("SELECT COUNT(*) FROM payments").fetchone()[0], count)
+
+
+class MonthRangeTests(unittest.TestCase):
+    def test_whole_months(self):
+        self.assertEqual(ut.MonthlyRollups.get_month_range(), (None, None))
+        self.assertEqual(ut.MonthlyRollups.get_month_range(month_start(2023, 1), month_end(2023, 12)),
+                         (ut.to_month(month_start(2023, 1)), ut.to_month(month_start(2023, 12))))
+        self.assertIsNotNone(ut.MonthlyRollups.get_month_range(month_start(2024, 2), month_end(2024, 2)))
+        self.assertIsNotNone(ut.MonthlyRollups.get_month_range(date.min.toordinal(), date.max.toordinal()))
+
+    def test_partial_months(self):
+        self.assertIsNone(ut.MonthlyRollups.get_month_range(month_start(2023, 1) + 1, None))
+        self.assertIsNone(ut.MonthlyRollups.get_month_range(None, month_end(2023, 1) - 1))
+        self.assertIsNone(ut.MonthlyRollups.get_month_range(month_start(2024, 2), date(2024, 2, 28).toordinal()))
+
+
+if __name__ == "__main__":
+    unittest.main()